@@ -3,6 +3,8 @@ Data cleaning and table classification utilities.
 """
 
 import re
+
+import numpy as np
 import pandas as pd
 
 from table_reader.lib.text import (
@@ -15,6 +17,51 @@ from table_reader.lib.text import (
     normalize_day,
 )
 
+try:
+    # Optional: google-re2 compiles to a linear-time DFA — the month
+    # alternations scan without backtracking on OCR-garbled input.
+    import re2 as _re2
+except ImportError:
+    _re2 = None
+
+
+def _compile_ci(pattern: str):
+    """
+    Compile a pattern case-insensitively, through re2 when usable.
+    google-re2 has no flags argument, so case-insensitivity goes inline via
+    (?i); any re2 API/compilation problem falls back to stdlib re.
+    """
+    if _re2 is not None:
+        try:
+            return _re2.compile("(?i)" + pattern)
+        except Exception:
+            pass
+    return re.compile(pattern, re.IGNORECASE)
+
+# Precompiled once at import — these run per row via DataFrame .apply and
+# would otherwise round-trip through re's internal pattern cache each call.
+_MONTHS_INNER = MONTHS_PATTERN[3:-1]  # strip (?: and )
+_RE_CENTS_COMMA = re.compile(r",\d{2}(?:\D|$)")
+_RE_DIGIT_SLASH = re.compile(r"(\d)/(\d)")
+_RE_MISSING_DECIMAL = re.compile(r"\d{4,}")
+_RE_FUZZY_DATE = _compile_ci(r"(\d{1,2}[^-]*)-(\w+)-(\d{4})")
+_RE_FULL_DATE = _compile_ci(r"(\d{1,2})-(" + _MONTHS_INNER + r")-(\d{4})")
+_RE_SHORT_DATE = _compile_ci(r"(\d{1,2})-(" + _MONTHS_INNER + r")")
+_RE_PCT = re.compile(r"[\d]+\.?\d*%?")
+_RE_ANY_DIGIT = re.compile(r"\d")
+_RE_NON_DIGIT = re.compile(r"[^\d]")
+
+# Single alternation covering the date fixups that used to run as separate
+# re.sub passes: border-bleed chars and digit-'/' misreads of '7'.
+# (Stays on stdlib re: re2 does not support the lookahead.)
+_RE_DATE_FIXUP = re.compile(r"[\[\]|\\]|(\d)/(?=\d|[\s\[\]|\\]*$)")
+
+
+def _date_fixup_repl(match: re.Match) -> str:
+    """Dispatch for _RE_DATE_FIXUP: 'd/' → 'd7', border chars → space."""
+    digit = match.group(1)
+    return digit + "7" if digit else " "
+
 
 def classify_table(header_text: str) -> tuple[str, str]:
     """
@@ -46,18 +93,18 @@ def clean_amount(raw: str) -> str:
     cleaned = raw.replace("$", "").replace(" ", "").replace("_", "").strip()
     if cleaned.endswith("]"):
         cleaned = cleaned[:-1]
-    if re.search(r",\d{2}(?:\D|$)", cleaned) and cleaned.count(",") == 1:
+    if _RE_CENTS_COMMA.search(cleaned) and cleaned.count(",") == 1:
         cleaned = cleaned.replace(",", ".")
     else:
         cleaned = cleaned.replace(",", "")
     cleaned = cleaned.replace("O", "0").replace("o", "0")
     cleaned = cleaned.replace("S", "5").replace("s", "5")
     cleaned = cleaned.replace("l", "1").replace("I", "1")
-    cleaned = re.sub(r"(\d)/(\d)", r"\g<1>7\2", cleaned)
+    cleaned = _RE_DIGIT_SLASH.sub(r"\g<1>7\2", cleaned)
     result = first_number(cleaned)
     # If the number is all digits (no decimal) and has 4+ digits,
     # it's likely a missing decimal point — insert one 2 places from end.
-    if re.fullmatch(r"\d{4,}", result):
+    if _RE_MISSING_DECIMAL.fullmatch(result):
         result = result[:-2] + "." + result[-2:]
     return result
 
@@ -70,15 +117,14 @@ def clean_date(raw: str) -> str:
     """
     if not raw:
         return ""
-    cleaned = sanitize_ocr(raw)
+    # One combined fixup pass instead of the sanitize_ocr sub chain
+    cleaned = _RE_DATE_FIXUP.sub(_date_fixup_repl, raw)
+    cleaned = " ".join(cleaned.split())
 
     # Broad pattern: capture any word-like month token (letters only) so
     # normalize_month() can fuzzy-match it, and capture the day and year.
     # Allows extra characters in the month string (e.g. 'Apbr', 'Abpr').
-    match = re.search(
-        r"(\d{1,2}[^-]*)-(\w+)-(\d{4})",
-        cleaned, flags=re.IGNORECASE
-    )
+    match = _RE_FUZZY_DATE.search(cleaned)
     if match:
         raw_day, raw_month, year = match.group(1), match.group(2), match.group(3)
         day = normalize_day(raw_day)
@@ -88,11 +134,7 @@ def clean_date(raw: str) -> str:
             return f"{year}-{month_num}-{day}"
 
     # Fallback: try with exact MONTHS_PATTERN (original logic)
-    months_inner = MONTHS_PATTERN[3:-1]  # strip (?: and )
-    match = re.search(
-        r"(\d{1,2})-(" + months_inner + r")-(\d{4})",
-        cleaned, flags=re.IGNORECASE
-    )
+    match = _RE_FULL_DATE.search(cleaned)
     if match:
         day = match.group(1).zfill(2)
         month_str = match.group(2).capitalize()
@@ -101,7 +143,7 @@ def clean_date(raw: str) -> str:
         return f"{year}-{month_num}-{day}"
 
     # No year: partial date (month/day only)
-    match = re.search(r"(\d{1,2})-(" + months_inner + r")", cleaned, flags=re.IGNORECASE)
+    match = _RE_SHORT_DATE.search(cleaned)
     if match:
         day = match.group(1).zfill(2)
         month_str = match.group(2).capitalize()
@@ -116,27 +158,88 @@ def clean_percentage(raw: str) -> str:
     if not raw:
         return ""
     cleaned = raw.replace(" ", "").strip()
-    match = re.search(r"[\d]+\.?\d*%?", cleaned)
+    match = _RE_PCT.search(cleaned)
     return match.group() if match else cleaned
 
 
+def clean_amount_series(s: pd.Series) -> pd.Series:
+    """
+    Vectorised clean_amount over a whole column. Each step is a single C
+    pass over the string array instead of one Python frame per row.
+    Returns float64 (NaN for unparseable cells) so amounts stay numeric
+    through export instead of round-tripping as text.
+    """
+    s = s.fillna("").astype(str)
+    # Tesseract often reads an isolated '$' as '3', '5', 'S', etc.
+    s = s.str.replace(r"^\s*[35Ss1oO8]\s+", "", regex=True)
+    s = s.str.replace(r"[$\s_]", "", regex=True)
+    s = s.str.replace(r"\]$", "", regex=True)
+    # European-style cents comma → decimal point; otherwise drop thousands commas
+    cents = s.str.contains(_RE_CENTS_COMMA) & (s.str.count(",") == 1)
+    s = s.str.replace(",", ".", regex=False).where(cents, s.str.replace(",", "", regex=False))
+    for bad, good in (("O", "0"), ("o", "0"), ("S", "5"), ("s", "5"), ("l", "1"), ("I", "1")):
+        s = s.str.replace(bad, good, regex=False)
+    s = s.str.replace(r"(\d)/(\d)", r"\g<1>7\2", regex=True)
+    s = s.str.extract(r"(-?[\d]+\.?\d*)", expand=False).fillna(s)
+    # All-digit values of 4+ chars: likely missing decimal point
+    missing_decimal = s.str.fullmatch(r"\d{4,}")
+    fixed = s.str.slice(0, -2) + "." + s.str.slice(-2)
+    return pd.to_numeric(fixed.where(missing_decimal, s), errors="coerce")
+
+
+def clean_date_series(s: pd.Series) -> pd.Series:
+    """
+    Vectorised clean_date: sanitize and extract day/month/year with
+    whole-column string ops; only rows the broad pattern misses (partial
+    dates, garbled months) fall back to the per-row clean_date.
+    """
+    s = s.fillna("").astype(str)
+    cleaned = s.str.replace(r"[\[\]|\\]", " ", regex=True)
+    cleaned = cleaned.str.replace(r"\s+", " ", regex=True).str.strip()
+    cleaned = cleaned.str.replace(r"(\d)/$", r"\g<1>7", regex=True)
+    cleaned = cleaned.str.replace(r"(\d)/(\d)", r"\g<1>7\2", regex=True)
+
+    parts = cleaned.str.extract(r"(\d{1,2})[^-]*-(\w+)-(\d{4})")
+    day = parts[0].str.zfill(2)
+    month_num = parts[1].map(normalize_month, na_action="ignore").map(MONTH_MAP)
+    result = (parts[2] + "-" + month_num + "-" + day).where(parts[0].notna() & month_num.notna())
+
+    misses = result.isna()
+    if misses.any():
+        result.loc[misses] = cleaned.loc[misses].map(clean_date)
+    return result
+
+
+_HEADER_KEYWORDS = ("fecha", "descripción", "monto", "saldo", "pago",
+                    "movimiento", "tasa", "interés", "cargo")
+_TOTAL_KEYWORDS = ("total cargos", "total abonos", "total de cargos", "total de abonos")
+
+
+def row_kind(row_data: list) -> str:
+    """
+    Classify a row as 'empty', 'total', 'header' or 'data' in one pass:
+    the row is lowercased and joined once instead of separately per check.
+    """
+    joined = " ".join(str(x) for x in row_data).lower()
+    if not joined.strip():
+        return "empty"
+    if any(kw in joined for kw in _TOTAL_KEYWORDS):
+        return "total"
+    if sum(1 for kw in _HEADER_KEYWORDS if kw in joined) >= 2:
+        return "header"
+    return "data"
+
+
 def is_header_row(row_data: list) -> bool:
     """Check if a row is a column header row (not actual data)."""
     text = " ".join(str(x).lower() for x in row_data)
-    header_keywords = ["fecha", "descripción", "monto", "saldo", "pago",
-                       "movimiento", "tasa", "interés", "cargo"]
-    return sum(1 for kw in header_keywords if kw in text) >= 2
+    return sum(1 for kw in _HEADER_KEYWORDS if kw in text) >= 2
 
 
 def is_total_row(row_data: list) -> bool:
     """Check if a row is a summary/total row (e.g. 'Total cargos', 'Total de cargos')."""
     text = " ".join(str(x).lower() for x in row_data)
-    return (
-        "total cargos" in text
-        or "total abonos" in text
-        or "total de cargos" in text
-        or "total de abonos" in text
-    )
+    return any(kw in text for kw in _TOTAL_KEYWORDS)
 
 
 def parse_total_row(row_data: list) -> tuple[str, str] | None:
@@ -172,7 +275,7 @@ def _amount_str_diff_one_digit(a: str, b: str) -> bool:
         s = s.strip()
         if "." in s:
             return s
-        return s + ".00" if re.search(r"\d", s) else s
+        return s + ".00" if _RE_ANY_DIGIT.search(s) else s
     a, b = norm(a), norm(b)
     if len(a) != len(b):
         return False
@@ -189,7 +292,7 @@ def _try_decimal_insertion(raw_str: str, expected_remainder: float) -> float | N
     Returns corrected float if inserting a decimal in `raw_str` yields
     `expected_remainder`, or None.
     """
-    digits = re.sub(r"[^\d]", "", raw_str)
+    digits = _RE_NON_DIGIT.sub("", raw_str)
     if len(digits) < 3:
         return None
     for pos in range(len(digits) - 2, max(0, len(digits) - 4), -1):
@@ -217,7 +320,8 @@ def reconcile_totals_and_fix(
       2. Missing decimal point (e.g. '81135' → '811.35').
       3. Large outlier replacement when the diff magnitude is close to
          one transaction's value.
-    Corrects cells in-place and returns [(row_index, old_value, new_value), ...].
+    Corrects cells in-place (amounts stay float64) and returns
+    [(row_index, old_value, new_value), ...] with display strings.
     """
     if df.empty or monto_col not in df.columns or tipo_col not in df.columns:
         return []
@@ -251,7 +355,7 @@ def reconcile_totals_and_fix(
             idx, amt, candidate, _ = candidates[0]
             old_val = str(df.at[idx, monto_col])
             new_val = f"{candidate:.2f}"
-            df.at[idx, monto_col] = new_val
+            df.at[idx, monto_col] = round(candidate, 2)
             corrections.append((int(idx), old_val, new_val))
             numeric_monto.loc[idx] = candidate
             continue
@@ -271,8 +375,8 @@ def reconcile_totals_and_fix(
             needed = expected - sum_without[idx]
             if needed <= 0:
                 continue
-            # Try decimal insertion on the raw string
-            raw_val = str(df.at[idx, monto_col])
+            # Try decimal insertion on the digits ('%g' avoids a trailing .0)
+            raw_val = f"{amt:g}"
             fixed = _try_decimal_insertion(raw_val, needed)
             if fixed is not None:
                 score = abs(amt - fixed) / max(amt, 1)
@@ -284,7 +388,7 @@ def reconcile_totals_and_fix(
             idx, amt, fixed = best_fix
             old_val = str(df.at[idx, monto_col])
             new_val = f"{fixed:.2f}"
-            df.at[idx, monto_col] = new_val
+            df.at[idx, monto_col] = round(fixed, 2)
             corrections.append((int(idx), old_val, new_val))
             numeric_monto.loc[idx] = fixed
             continue
@@ -309,7 +413,7 @@ def reconcile_totals_and_fix(
             idx, amt, needed, _ = outlier_candidates[0]
             old_val = str(df.at[idx, monto_col])
             new_val = f"{needed:.2f}"
-            df.at[idx, monto_col] = new_val
+            df.at[idx, monto_col] = round(needed, 2)
             corrections.append((int(idx), old_val, new_val))
             numeric_monto.loc[idx] = needed
 
@@ -318,10 +422,10 @@ def reconcile_totals_and_fix(
 
 def clean_msi_dataframe(df: pd.DataFrame) -> pd.DataFrame:
     """Clean MSI table data."""
-    df["Fecha de la operación"] = df["Fecha de la operación"].apply(clean_date)
-    df["Monto original"] = df["Monto original"].apply(clean_amount)
-    df["Saldo pendiente"] = df["Saldo pendiente"].apply(clean_amount)
-    df["Pago requerido"] = df["Pago requerido"].apply(clean_amount)
+    df["Fecha de la operación"] = clean_date_series(df["Fecha de la operación"])
+    df["Monto original"] = clean_amount_series(df["Monto original"])
+    df["Saldo pendiente"] = clean_amount_series(df["Saldo pendiente"])
+    df["Pago requerido"] = clean_amount_series(df["Pago requerido"])
     df["Tasa de interés aplicable"] = df["Tasa de interés aplicable"].apply(clean_percentage)
     return df
 
@@ -332,16 +436,22 @@ REGULAR_FINAL_COLUMNS = [
 ]
 
 
-def clean_regular_dataframe(df: pd.DataFrame, card_type: str) -> pd.DataFrame:
-    """Clean regular (No a meses) table data and update column structure."""
-    df["Fecha Transacción"] = df["Fecha de la operación"].apply(clean_date)
-    df["Fecha Cargo"] = df["Fecha de cargo"].apply(clean_date)
+def clean_regular_dataframe(df: pd.DataFrame, card_type: str | pd.Series) -> pd.DataFrame:
+    """
+    Clean regular (No a meses) table data and update column structure.
+    card_type is either a scalar for a single-card table or a per-row
+    Series when cleaning consolidated rows from several cards at once.
+    """
+    df["Fecha Transacción"] = clean_date_series(df["Fecha de la operación"])
+    df["Fecha Cargo"] = clean_date_series(df["Fecha de cargo"])
     df["Descripción"] = df["Descripción del movimiento"].apply(sanitize_ocr)
-    df["Tipo"] = df["Tipo"].apply(lambda x: x.strip() if x else "+")
-    df["Tipo"] = df["Tipo"].apply(lambda x: "Abono" if x == "-" else "Cargo")
-    df["Monto"] = df["Monto"].apply(clean_amount)
-    df["Monto"] = df["Monto"].apply(lambda x: x.lstrip("-") if x else x)
-    df["Tipo Tarjeta"] = card_type.capitalize()
+    tipo = df["Tipo"].fillna("").astype(str).str.strip()
+    df["Tipo"] = np.where(tipo == "-", "Abono", "Cargo")
+    df["Monto"] = clean_amount_series(df["Monto"]).abs()
+    if isinstance(card_type, pd.Series):
+        df["Tipo Tarjeta"] = card_type.str.capitalize()
+    else:
+        df["Tipo Tarjeta"] = card_type.capitalize()
     df["De quien"] = ""
     df["Comentario"] = ""
     return df[REGULAR_FINAL_COLUMNS]
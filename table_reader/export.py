@@ -5,10 +5,31 @@ Export utilities for CSV and Excel (Google Sheets compatible).
 from pathlib import Path
 
 import pandas as pd
-from openpyxl.worksheet.worksheet import Worksheet
+from xlsxwriter.worksheet import Worksheet
 
 from table_reader.summary import build_summary
 
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+except ImportError:
+    pa = None
+
+
+def _write_csv(df: pd.DataFrame, filepath: Path) -> None:
+    """
+    Write one Google-Sheets-compatible CSV (UTF-8 BOM). Uses Arrow's C++
+    writer when pyarrow is installed — a single pass without per-value
+    Python formatting — falling back to pandas otherwise.
+    """
+    if pa is not None:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        with open(filepath, "wb") as f:
+            f.write(b"\xef\xbb\xbf")
+            pacsv.write_csv(table, f, write_options=pacsv.WriteOptions(include_header=True))
+    else:
+        df.to_csv(filepath, index=False, encoding="utf-8-sig")
+
 
 def export_csv(
     dataframes: dict[str, pd.DataFrame], output_dir: Path | str
@@ -20,14 +41,14 @@ def export_csv(
     for sheet_name, df in dataframes.items():
         filename = sheet_name.lower().replace(" ", "_") + ".csv"
         filepath = out / filename
-        df.to_csv(filepath, index=False, encoding="utf-8-sig")
+        _write_csv(df, filepath)
         files.append(filepath)
         print(f"   💾 {filepath}")
 
     if "No a Meses Consolidado" in dataframes:
         summary_df = build_summary()
         summary_path = out / "resumen.csv"
-        summary_df.to_csv(summary_path, index=False, encoding="utf-8-sig")
+        _write_csv(summary_df, summary_path)
         files.append(summary_path)
         print(f"   💾 {summary_path}")
 
@@ -49,7 +70,14 @@ def export_excel(
     if "No a Meses Consolidado" in dataframes:
         summary_df = build_summary()
 
-    with pd.ExcelWriter(filepath, engine="openpyxl") as writer:
+    # No constant_memory: pandas emits cells column-by-column, and that mode
+    # discards writes to already-flushed rows, silently dropping data.
+    # strings_to_formulas keeps the Resumen formulas live.
+    with pd.ExcelWriter(
+        filepath,
+        engine="xlsxwriter",
+        engine_kwargs={"options": {"strings_to_formulas": True}},
+    ) as writer:
         for sheet_name, df in dataframes.items():
             df.to_excel(writer, sheet_name=sheet_name, index=False)
             _autofit_columns(writer.sheets[sheet_name], df)
@@ -66,9 +94,8 @@ def export_excel(
 
 def _autofit_columns(ws: Worksheet, df: pd.DataFrame, max_width: int = 50) -> None:
     """Set each column width to max content length (capped at max_width)."""
-    for col_idx, col_name in enumerate(df.columns, 1):
-        max_len = len(str(col_name))
-        for val in df[col_name]:
-            max_len = max(max_len, len(str(val)) if val is not None else 0)
-        letter = ws.cell(row=1, column=col_idx).column_letter
-        ws.column_dimensions[letter].width = min(max_len + 2, max_width)
+    for col_idx, col_name in enumerate(df.columns):
+        # Vectorised max content length; only the ≤8 columns are looped here
+        lengths = df[col_name].dropna().astype(str).str.len()
+        max_len = max(len(str(col_name)), int(lengths.max()) if not lengths.empty else 0)
+        ws.set_column(col_idx, col_idx, min(max_len + 2, max_width))
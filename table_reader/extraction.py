@@ -2,10 +2,11 @@
 Main table extraction logic.
 """
 
-import re
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 
+import numpy as np
 import pdfplumber
 import pandas as pd
 from PIL import Image
@@ -16,133 +17,124 @@ from table_reader.constants import (
     MSI_COLUMNS,
     REGULAR_RAW_COLUMNS,
 )
-from table_reader.ocr import ocr_cell, detect_sign_cell, ocr_region, AMOUNT_CHAR_WHITELIST
+from table_reader.ocr import (
+    PageWords,
+    detect_sign_cell,
+    ocr_page_words,
+    ocr_region,
+    words_in_rect,
+)
 from table_reader.data_cleaning import (
     classify_table,
-    is_header_row,
-    is_total_row,
     parse_total_row,
+    row_kind,
     clean_msi_dataframe,
     clean_regular_dataframe,
     clean_amount,
     reconcile_totals_and_fix,
 )
+from table_reader.lib.image import SCALE
 from table_reader.lib.text import looks_numeric
 
-# Max workers for table-level parallel extraction
-_MAX_EXTRACT_WORKERS = 4
+# Segment extracted from one page: (table_idx, category, card_type, data_rows, totals)
+_PageSegment = tuple[int, str | None, str | None, list[list], dict[str, str]]
 
 
-def _segment_classify(
-    page_img: Image.Image, table
-) -> tuple[str, str | None]:
-    """
-    Classify a table segment from header only (OCR merged cells).
-    Returns (category, card_type) with category in ('msi','regular','continuation','unknown'),
-    card_type in ('titular','adicional') or None for continuation.
-    """
-    rows = table.rows
-    if not rows:
-        return "unknown", None
-    header_text = ""
-    for ri, row in enumerate(rows):
-        cells = row.cells
-        non_none = [c for c in cells if c is not None]
-        if len(non_none) <= 1:
-            if non_none:
-                text = ocr_region(page_img, non_none[0])
-                header_text += " " + text
-        else:
-            break
-    category, card_type = classify_table(header_text)
-    if category == "unknown":
-        return "continuation", None
-    return category, card_type
+def _sheet_name(category: str, card_type: str | None) -> str:
+    """Map (category, card_type) to the output sheet name ('' for unknown)."""
+    suffix = "Adicional" if card_type == "adicional" else "Titular"
+    if category == "msi":
+        return f"MSI {suffix}"
+    if category == "regular":
+        return f"No a Meses {suffix}"
+    return ""
 
 
-def _build_table_groups(
-    pages: list,
-    page_images: list[Image.Image],
-    table_settings: dict,
-) -> list[list[tuple[int, int, object]]]:
-    """
-    Build groups of table segments. Each group is a list of (page_idx, table_idx, table).
-    Tables that continue onto the next page are in the same group.
+def _process_page(
+    pdf_path: str, page_index: int, table_settings: dict
+) -> tuple[int, list[_PageSegment]]:
     """
-    groups: list[list[tuple[int, int, object]]] = []
-    current_group: list[tuple[int, int, object]] | None = None
-    last_category: str | None = None
-    last_card_type: str | None = None
-
-    for pi, page in enumerate(pages):
-        found_tables = page.find_tables(table_settings)
-        for ti, table in enumerate(found_tables):
-            category, card_type = _segment_classify(page_images[pi], table)
-            if category == "continuation" and current_group is not None:
-                current_group.append((pi, ti, table))
-            else:
-                current_group = [(pi, ti, table)]
-                groups.append(current_group)
-                if category not in ("continuation", "unknown"):
-                    last_category = category
-                    last_card_type = card_type or "titular"
-    return groups
-
-
-def _process_group(
-    group: list[tuple[int, int, object]],
-    page_images: list[Image.Image],
-) -> tuple[int, int, str, list[list], dict[str, str]]:
-    """
-    Extract one logical table (possibly spanning pages). Returns
-    (first_page_idx, first_table_idx, sheet_name, data_rows, totals).
+    Worker: render and OCR a single page, extract every table segment on it.
+    Runs in a separate process, so it reopens the PDF itself. Continuation
+    segments are stitched to their parent table by the caller in page order.
     """
-    first_pi, first_ti, first_table = group[0]
-    page_img0 = page_images[first_pi]
-
-    category, card_type, data_rows, totals = extract_table_data(
-        page_img0, first_table, first_pi
-    )
-
-    for pi, ti, table in group[1:]:
-        page_img = page_images[pi]
-        cont_rows, cont_totals = extract_continuation_table(page_img, table)
-        data_rows.extend(cont_rows)
-        if cont_totals:
-            totals.update(cont_totals)
+    # Only parse the worker's own page (pdfplumber page numbers are 1-based)
+    with pdfplumber.open(pdf_path, pages=[page_index + 1]) as pdf:
+        page = pdf.pages[0]
+        # Table detection with the "lines" strategy is vector-based, so run
+        # it first: pages without tables skip the 300 DPI render and the
+        # page OCR pass entirely. The one rendered image is shared by the
+        # OCR word pass and the grayscale sign-detection array below.
+        tables = page.find_tables(table_settings)
+        if not tables:
+            return page_index, []
+
+        page_img = page.to_image(resolution=RENDER_DPI).original
+        # Content is monochrome: convert the page to grayscale once and use
+        # the L-mode image everywhere (cell crops inherit the mode, so the
+        # per-cell RGB→L conversions disappear). Sign detection slices the
+        # same pixel buffer as a NumPy array.
+        if page_img.mode != "L":
+            page_img = page_img.convert("L")
+        page_gray = np.asarray(page_img)
+        words = ocr_page_words(page_img)
+
+        segments: list[_PageSegment] = []
+        for ti, table in enumerate(tables):
+            category, card_type, data_rows, totals = extract_table_data(
+                page_img, page_gray, words, table, page_index
+            )
+            if category == "continuation":
+                data_rows, totals = extract_continuation_table(page_gray, words, table)
+            segments.append((ti, category, card_type, data_rows, totals))
+    return page_index, segments
 
-    # First segment is never continuation (groups are built so continuations attach to previous)
-    if category == "msi":
-        sheet_name = f"MSI {'Adicional' if card_type == 'adicional' else 'Titular'}"
-    elif category == "regular":
-        sheet_name = f"No a Meses {'Adicional' if card_type == 'adicional' else 'Titular'}"
-    else:
-        sheet_name = ""  # unknown: skip in aggregation
 
-    return (first_pi, first_ti, sheet_name, data_rows, totals)
+def _scaled_row_rects(
+    rows: list, page_shape: tuple[int, ...]
+) -> list[list[tuple[int, int, int, int] | None]]:
+    """
+    Precompute clipped integer pixel rects for every cell of every row in a
+    single vectorised pass, aligned with row.cells (None stays None).
+    """
+    flat = [c for row in rows for c in row.cells if c is not None]
+    if not flat:
+        return [[None] * len(row.cells) for row in rows]
+    rects = (np.asarray(flat, dtype=np.float64) * SCALE).astype(np.int32)
+    height, width = page_shape[:2]
+    np.clip(rects[:, 0::2], 0, width, out=rects[:, 0::2])
+    np.clip(rects[:, 1::2], 0, height, out=rects[:, 1::2])
+    flat_iter = iter(rects.tolist())
+    return [
+        [tuple(next(flat_iter)) if c is not None else None for c in row.cells]
+        for row in rows
+    ]
 
 
 def _ocr_regular_row(
-    page_img: Image.Image, cells: list, row_data: list
+    page_gray: np.ndarray, words: PageWords, cells: list, rects: list, row_data: list
 ) -> None:
     """Fill row_data in place for a regular (5-col) table row; cells may have Nones."""
-    for ci, cell in enumerate(cells):
+    for cell, rect in zip(cells, rects):
         if cell is None:
             row_data.append("")
             continue
         cell_width = cell[2] - cell[0]
         if cell_width < 20:
-            text = detect_sign_cell(page_img, cell)
-        elif ci == 4:
-            # Amount column: restrict OCR to digit/number characters
-            text = ocr_cell(page_img, cell, char_whitelist=AMOUNT_CHAR_WHITELIST)
+            # Narrow ± column: Tesseract is unreliable on isolated signs,
+            # keep the pixel heuristic.
+            text = detect_sign_cell(page_gray, rect)
         else:
-            text = ocr_cell(page_img, cell)
+            text = words_in_rect(words, rect)
         row_data.append(text)
 
 
 def extract_table_data(
-    page_img: Image.Image, table, page_index: int
+    page_img: Image.Image,
+    page_gray: np.ndarray,
+    words: PageWords,
+    table,
+    page_index: int,
 ) -> tuple[str | None, str | None, list, dict[str, str]]:
     """
     Extract data from a pdfplumber Table using cell-by-cell OCR.
@@ -173,34 +165,34 @@ def extract_table_data(
     expected_cols = 7 if is_msi else 5
     data_rows: list[list] = []
     totals: dict[str, str] = {}
+    row_rects = _scaled_row_rects(rows, page_gray.shape)
 
     for ri in range(data_start_idx, len(rows)):
         row = rows[ri]
         cells = row.cells
+        rects = row_rects[ri]
         non_none_cells = [(ci, c) for ci, c in enumerate(cells) if c is not None]
         if len(non_none_cells) < 3:
             continue
 
         row_data: list[str] = []
         if is_msi:
-            for ci, cell in enumerate(cells):
+            for cell, rect in zip(cells, rects):
                 if cell is None:
                     row_data.append("")
                     continue
-                text = ocr_cell(page_img, cell)
-                row_data.append(text)
+                row_data.append(words_in_rect(words, rect))
         else:
-            _ocr_regular_row(page_img, cells, row_data)
+            _ocr_regular_row(page_gray, words, cells, rects, row_data)
 
-        if is_total_row(row_data):
+        kind = row_kind(row_data)
+        if kind == "total":
             parsed = parse_total_row(row_data)
             if parsed:
-                kind, amount_str = parsed
-                totals["total_" + kind] = amount_str
-            continue
-        if is_header_row(row_data):
+                total_kind, amount_str = parsed
+                totals["total_" + total_kind] = amount_str
             continue
-        if not any(row_data):
+        if kind != "data":
             continue
         while len(row_data) < expected_cols:
             row_data.append("")
@@ -211,7 +203,7 @@ def extract_table_data(
 
 
 def extract_continuation_table(
-    page_img: Image.Image, table
+    page_gray: np.ndarray, words: PageWords, table
 ) -> tuple[list[list], dict[str, str]]:
     """
     Extract rows from a continuation table (no header).
@@ -220,25 +212,25 @@ def extract_continuation_table(
     rows = table.rows
     data_rows: list[list] = []
     totals: dict[str, str] = {}
+    row_rects = _scaled_row_rects(rows, page_gray.shape)
 
-    for row in rows:
+    for ri, row in enumerate(rows):
         cells = row.cells
         non_none_cells = [(ci, c) for ci, c in enumerate(cells) if c is not None]
         if len(non_none_cells) < 2:
             continue
 
         row_data: list[str] = []
-        _ocr_regular_row(page_img, cells, row_data)
+        _ocr_regular_row(page_gray, words, cells, row_rects[ri], row_data)
 
-        if is_total_row(row_data):
+        kind = row_kind(row_data)
+        if kind == "total":
             parsed = parse_total_row(row_data)
             if parsed:
-                kind, amount_str = parsed
-                totals["total_" + kind] = amount_str
-            continue
-        if is_header_row(row_data):
+                total_kind, amount_str = parsed
+                totals["total_" + total_kind] = amount_str
             continue
-        if not any(str(x).strip() for x in row_data):
+        if kind != "data":
             continue
         while len(row_data) < 5:
             row_data.append("")
@@ -274,18 +266,12 @@ def process_pdf(
     pdf_path: Path | str, output_dir: Path | str
 ) -> dict[str, pd.DataFrame]:
     """Process the PDF and return extracted DataFrames."""
-    pdf = pdfplumber.open(pdf_path)
     pdf_path_str = str(pdf_path)
+    with pdfplumber.open(pdf_path) as pdf:
+        n_pages = len(pdf.pages)
 
     print(f"📄 Opening PDF: {pdf_path_str}")
-    print(f"   Pages: {len(pdf.pages)}")
-
-    page_images: list[Image.Image] = []
-    for i, page in enumerate(pdf.pages):
-        img = page.to_image(resolution=RENDER_DPI)
-        pil_img = img.original
-        page_images.append(pil_img)
-        print(f"   ✅ Page {i+1} rendered ({pil_img.width}×{pil_img.height}px)")
+    print(f"   Pages: {n_pages}")
 
     tables_data: dict[str, list] = {
         "MSI Titular": [],
@@ -296,85 +282,118 @@ def process_pdf(
     table_totals: dict[str, dict[str, str]] = {}
     table_settings = {"vertical_strategy": "lines", "horizontal_strategy": "lines"}
 
-    groups = _build_table_groups(pdf.pages, page_images, table_settings)
-    total_tables = sum(len(g) for g in groups)
-    print(f"\n🔍 Tables found: {total_tables} segment(s) in {len(groups)} logical table(s)")
-
-    group_results: list[tuple[int, int, str, list, dict[str, str]]] = []
-    with ThreadPoolExecutor(max_workers=_MAX_EXTRACT_WORKERS) as executor:
+    # One worker per page: render + batched OCR + extraction run in parallel,
+    # results are merged back in deterministic page order below.
+    page_segments: dict[int, list[_PageSegment]] = {}
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
         futures = {
-            executor.submit(_process_group, group, page_images): group
-            for group in groups
+            executor.submit(_process_page, pdf_path_str, pi, table_settings): pi
+            for pi in range(n_pages)
         }
         for future in as_completed(futures):
-            group = futures[future]
-            first_pi, first_ti, sheet_name, data_rows, totals = future.result()
-            if not sheet_name or not data_rows:
+            pi, segments = future.result()
+            page_segments[pi] = segments
+            print(f"   ✅ Page {pi+1} processed ({len(segments)} table segment(s))")
+
+    total_tables = sum(len(s) for s in page_segments.values())
+    print(f"\n🔍 Tables found: {total_tables} segment(s)")
+
+    # Stitch continuation segments onto the preceding table, in document order
+    current_sheet: str | None = None
+    for pi in range(n_pages):
+        for _ti, category, card_type, data_rows, totals in page_segments[pi]:
+            if category is None:
+                continue
+            if category == "continuation":
+                sheet_name = current_sheet or ""
+            else:
+                sheet_name = _sheet_name(category, card_type)
+                current_sheet = sheet_name
+            if not sheet_name:
                 continue
-            group_results.append((first_pi, first_ti, sheet_name, data_rows, totals))
-
-    # Sort by document order and aggregate
-    group_results.sort(key=lambda x: (x[0], x[1]))
-    for _pi, _ti, sheet_name, data_rows, totals in group_results:
-        tables_data[sheet_name].extend(data_rows)
-        if totals:
-            table_totals.setdefault(sheet_name, {}).update(totals)
-        cat = "msi" if "MSI" in sheet_name else "regular"
-        card = "adicional" if "Adicional" in sheet_name else "titular"
-        print(f"   ✅ {cat}/{card} — {len(data_rows)} rows → [{sheet_name}]")
+            if totals:
+                table_totals.setdefault(sheet_name, {}).update(totals)
+            if not data_rows:
+                continue
+            tables_data[sheet_name].extend(data_rows)
+            cat = "msi" if "MSI" in sheet_name else "regular"
+            card = "adicional" if "Adicional" in sheet_name else "titular"
+            print(f"   ✅ {cat}/{card} — {len(data_rows)} rows → [{sheet_name}]")
 
     result: dict[str, pd.DataFrame] = {}
-    for sheet_name, rows in tables_data.items():
+    for sheet_name in ("MSI Titular", "MSI Adicional"):
+        rows = tables_data[sheet_name]
         if not rows:
             print(f"\n📋 {sheet_name}: (empty)")
             continue
-        is_msi = "MSI" in sheet_name
-        cols = MSI_COLUMNS if is_msi else REGULAR_RAW_COLUMNS
-        df = pd.DataFrame(rows, columns=cols)
-        if is_msi:
-            df = clean_msi_dataframe(df)
-        else:
-            card_type = "adicional" if "Adicional" in sheet_name else "titular"
-            df = clean_regular_dataframe(df, card_type)
-            totals = table_totals.get(sheet_name, {})
-            total_cargos = _safe_float(totals.get("total_cargos"))
-            total_abonos = _safe_float(totals.get("total_abonos"))
-            # Only use per-table footer totals when no .env expected totals
-            # are configured, since PDF footer totals may span the entire
-            # statement rather than individual sub-tables.
-            has_env_expected = (
-                EXPECTED_NOAMESES_CARGOS is not None
-                or EXPECTED_NOAMESES_ABONOS is not None
-            )
-            if not has_env_expected and (total_cargos is not None or total_abonos is not None):
-                corrections = reconcile_totals_and_fix(df, total_cargos, total_abonos)
-                for idx, old_val, new_val in corrections:
-                    print(f"   🔧 Corrected OCR amount row {idx}: {old_val} → {new_val} (reconciled with statement total)")
+        df = clean_msi_dataframe(pd.DataFrame(rows, columns=MSI_COLUMNS))
         result[sheet_name] = df
         print(f"\n📋 {sheet_name}: {len(df)} transactions")
 
-    no_meses_dfs: list[pd.DataFrame] = []
-    if "No a Meses Titular" in result and not result["No a Meses Titular"].empty:
-        no_meses_dfs.append(result["No a Meses Titular"])
-    if "No a Meses Adicional" in result and not result["No a Meses Adicional"].empty:
-        no_meses_dfs.append(result["No a Meses Adicional"])
-
-    if no_meses_dfs:
-        consolidated_df = pd.concat(no_meses_dfs, ignore_index=True)
-        if EXPECTED_NOAMESES_CARGOS is not None or EXPECTED_NOAMESES_ABONOS is not None:
+    # Consolidate the regular raw rows before cleaning so the cleaning
+    # pipelines run once over the combined rows instead of per sheet
+    # followed by a row-rewalking concat.
+    titular_rows = tables_data["No a Meses Titular"]
+    adicional_rows = tables_data["No a Meses Adicional"]
+    n_titular = len(titular_rows)
+
+    if titular_rows or adicional_rows:
+        consolidated_df = pd.DataFrame(
+            titular_rows + adicional_rows, columns=REGULAR_RAW_COLUMNS
+        )
+        card_types = pd.Series(
+            ["titular"] * n_titular + ["adicional"] * len(adicional_rows),
+            index=consolidated_df.index,
+        )
+        consolidated_df = clean_regular_dataframe(consolidated_df, card_types)
+
+        # Only use per-table footer totals when no .env expected totals
+        # are configured, since PDF footer totals may span the entire
+        # statement rather than individual sub-tables.
+        has_env_expected = (
+            EXPECTED_NOAMESES_CARGOS is not None
+            or EXPECTED_NOAMESES_ABONOS is not None
+        )
+        if has_env_expected:
             corrections = reconcile_totals_and_fix(
                 consolidated_df,
                 total_cargos=EXPECTED_NOAMESES_CARGOS,
                 total_abonos=EXPECTED_NOAMESES_ABONOS,
             )
-            n_titular = len(result.get("No a Meses Titular", pd.DataFrame()))
             for idx, old_val, new_val in corrections:
                 print(f"   🔧 Corrected OCR amount row {idx}: {old_val} → {new_val} (reconciled with expected total)")
-                if idx < n_titular and "No a Meses Titular" in result:
-                    result["No a Meses Titular"].at[idx, "Monto"] = new_val
-                elif "No a Meses Adicional" in result:
-                    result["No a Meses Adicional"].at[idx - n_titular, "Monto"] = new_val
+        else:
+            for sheet_name, lo, hi in (
+                ("No a Meses Titular", 0, n_titular),
+                ("No a Meses Adicional", n_titular, len(consolidated_df)),
+            ):
+                totals = table_totals.get(sheet_name, {})
+                total_cargos = _safe_float(totals.get("total_cargos"))
+                total_abonos = _safe_float(totals.get("total_abonos"))
+                if total_cargos is None and total_abonos is None:
+                    continue
+                sub = consolidated_df.iloc[lo:hi].copy()
+                corrections = reconcile_totals_and_fix(sub, total_cargos, total_abonos)
+                for idx, old_val, new_val in corrections:
+                    consolidated_df.at[idx, "Monto"] = float(new_val)
+                    print(f"   🔧 Corrected OCR amount row {idx}: {old_val} → {new_val} (reconciled with statement total)")
+
+        # Per-card sheets are slices of the already-cleaned consolidated frame
+        for sheet_name, card in (
+            ("No a Meses Titular", "Titular"),
+            ("No a Meses Adicional", "Adicional"),
+        ):
+            df = consolidated_df.loc[consolidated_df["Tipo Tarjeta"] == card]
+            if df.empty:
+                print(f"\n📋 {sheet_name}: (empty)")
+                continue
+            result[sheet_name] = df.reset_index(drop=True)
+            print(f"\n📋 {sheet_name}: {len(df)} transactions")
+
         result["No a Meses Consolidado"] = consolidated_df
         print(f"\n📋 No a Meses Consolidado: {len(consolidated_df)} transactions")
+    else:
+        print("\n📋 No a Meses Titular: (empty)")
+        print("\n📋 No a Meses Adicional: (empty)")
 
     return result
@@ -2,11 +2,16 @@
 Image cropping and preparation for OCR (pure helpers, no Tesseract).
 """
 
-from PIL import Image, ImageFilter
+import cv2
+import numpy as np
+from PIL import Image
 
 # PDF points to pixels at 300 DPI (72 points per inch)
 SCALE = 300 / 72.0
 
+# 3×3 sharpen kernel (centre-weighted Laplacian)
+_SHARPEN_KERNEL = np.array([[0, -1, 0], [-1, 5, -1], [0, -1, 0]], dtype=np.float32)
+
 
 def crop_cell_image(
     page_img: Image.Image, bbox: tuple[float, float, float, float], pad: int = 5
@@ -22,11 +27,17 @@ def crop_cell_image(
 
 
 def prepare_for_ocr(img: Image.Image, min_height: int = 50) -> Image.Image:
-    """Upscale and sharpen an image for better OCR results."""
-    w, h = img.size
+    """
+    Upscale and sharpen an image for better OCR results.
+    Grayscale, resize and convolution all run as OpenCV passes on a single
+    uint8 array; PIL is only touched at the boundaries.
+    """
+    arr = np.asarray(img)
+    if arr.ndim == 3:
+        arr = cv2.cvtColor(arr, cv2.COLOR_RGB2GRAY)
+    h, w = arr.shape
     if h < min_height:
         factor = max(2, (min_height + h - 1) // h)
-        img = img.resize((w * factor, h * factor), Image.Resampling.LANCZOS)
-    img = img.convert("L")
-    img = img.filter(ImageFilter.SHARPEN)
-    return img
+        arr = cv2.resize(arr, (w * factor, h * factor), interpolation=cv2.INTER_LANCZOS4)
+    arr = cv2.filter2D(arr, -1, _SHARPEN_KERNEL)
+    return Image.fromarray(arr)
@@ -44,13 +44,20 @@ _MONTH_FUZZY: dict[str, str] = {
 # One optional minus, digits, optional decimal and fractional digits
 NUMERIC_PATTERN = re.compile(r"-?[\d]+\.?\d*")
 
+# Precompiled once at import; these run per cell on the cleaning hot path
+_RE_NON_ALPHA = re.compile(r"[^a-zA-Z]")
+_RE_NON_DIGIT = re.compile(r"[^\d]")
+_RE_BORDER = re.compile(r"[\[\]|\\]")
+_RE_TRAILING_DIGIT_SLASH = re.compile(r"(\d)/$")
+_RE_DIGIT_SLASH = re.compile(r"(\d)/(\d)")
+
 
 def normalize_month(raw: str) -> str:
     """
     Map a raw OCR month token (with possible extra chars) to a canonical
     Spanish abbreviation. Returns the original string if unrecognised.
     """
-    key = re.sub(r"[^a-zA-Z]", "", raw).lower()
+    key = _RE_NON_ALPHA.sub("", raw).lower()
     return _MONTH_FUZZY.get(key, raw.capitalize()[:3])
 
 
@@ -59,7 +66,7 @@ def normalize_day(raw: str) -> str:
     Strip non-digit trailing chars from a day token (e.g. '2/' → '2', '29p' → '29').
     Returns zero-padded 2-digit string.
     """
-    digits = re.sub(r"[^\d]", "", raw)
+    digits = _RE_NON_DIGIT.sub("", raw)
     if not digits:
         return raw
     return digits.zfill(2)
@@ -78,8 +85,8 @@ def first_number(s: str) -> str:
 
 def sanitize_ocr(raw: str) -> str:
     """Strip common border-bleed artefacts and normalise whitespace."""
-    cleaned = re.sub(r"[\[\]|\\]", " ", raw)
+    cleaned = _RE_BORDER.sub(" ", raw)
     cleaned = " ".join(cleaned.split())
-    cleaned = re.sub(r"(\d)/$", r"\g<1>7", cleaned)
-    cleaned = re.sub(r"(\d)/(\d)", r"\g<1>7\2", cleaned)
+    cleaned = _RE_TRAILING_DIGIT_SLASH.sub(r"\g<1>7", cleaned)
+    cleaned = _RE_DIGIT_SLASH.sub(r"\g<1>7\2", cleaned)
     return cleaned.strip()
@@ -2,15 +2,174 @@
 OCR utilities for table extraction (Tesseract wrappers and sign detection).
 """
 
+import hashlib
+import os
+import sqlite3
+import threading
+
 import numpy as np
 import pytesseract
 from PIL import Image
+from pytesseract import Output
 
 from table_reader.constants import AMOUNT_CHAR_WHITELIST
 from table_reader.lib.image import crop_cell_image, prepare_for_ocr
 
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+try:
+    import tesserocr
+    from tesserocr import OEM, PyTessBaseAPI
+except ImportError:
+    tesserocr = None
+
+# tesserocr handles are not thread-safe; keep one per (psm, lang) per thread
+_tess_local = threading.local()
+
+
+def _tess_api(psm: int, lang: str) -> "PyTessBaseAPI":
+    """
+    Return a thread-confined PyTessBaseAPI handle for the given page
+    segmentation mode. Reusing the handle keeps the LSTM engine and language
+    model loaded instead of forking a tesseract process per call.
+    """
+    apis = getattr(_tess_local, "apis", None)
+    if apis is None:
+        apis = _tess_local.apis = {}
+    key = (psm, lang)
+    api = apis.get(key)
+    if api is None:
+        # psm is passed as a plain int: tesserocr's PSM is a cdef enum
+        # namespace whose values cannot be instantiated
+        api = apis[key] = PyTessBaseAPI(lang=lang, psm=psm, oem=OEM.LSTM_ONLY)
+    return api
+
 # Re-export for extraction module
-__all__ = ["ocr_cell", "detect_sign_cell", "ocr_region", "AMOUNT_CHAR_WHITELIST"]
+__all__ = [
+    "ocr_cell",
+    "detect_sign_cell",
+    "ocr_region",
+    "ocr_page_words",
+    "words_in_rect",
+    "AMOUNT_CHAR_WHITELIST",
+]
+
+# (word_center_x, word_center_y, word_left, texts) in page-image pixel coords
+PageWords = tuple[np.ndarray, np.ndarray, np.ndarray, list[str]]
+
+# OCR results memoised by pixel-content hash: statements repeat the same
+# glyphs across cells and across monthly runs, so cache hits skip Tesseract
+# entirely. The sqlite file gives cross-run reuse; in-memory dict is bounded.
+_OCR_CACHE_PATH = os.getenv("OCR_CACHE_PATH", ".ocr_cache.sqlite")
+_OCR_CACHE_MAX_MEM = 4096
+_cache_local = threading.local()
+
+
+def _ocr_cache_conn() -> sqlite3.Connection | None:
+    """Per-thread sqlite connection to the persistent OCR cache (or None)."""
+    conn = getattr(_cache_local, "conn", False)
+    if conn is False:
+        try:
+            conn = sqlite3.connect(_OCR_CACHE_PATH)
+            # WAL lets the page workers read while another commits, and
+            # NORMAL sync drops the per-entry fsync (a lost tail entry on
+            # crash just means re-OCRing that cell next run)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=250")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS ocr_cache (key BLOB PRIMARY KEY, text TEXT)"
+            )
+        except sqlite3.Error:
+            conn = None  # unwritable location: run without persistence
+        _cache_local.conn = conn
+    return conn
+
+
+def _ocr_cached(cell_img: Image.Image, config_key: str, run) -> str:
+    """Look up OCR output by blake2b hash of the prepared pixels; run() on miss."""
+    h = hashlib.blake2b(np.asarray(cell_img).tobytes(), digest_size=16)
+    h.update(config_key.encode())
+    key = h.digest()
+
+    mem = getattr(_cache_local, "mem", None)
+    if mem is None:
+        mem = _cache_local.mem = {}
+    if key in mem:
+        return mem[key]
+
+    text: str | None = None
+    conn = _ocr_cache_conn()
+    if conn is not None:
+        try:
+            row = conn.execute("SELECT text FROM ocr_cache WHERE key = ?", (key,)).fetchone()
+        except sqlite3.Error:
+            row = None  # locked by a concurrent worker: treat as a miss
+        if row is not None:
+            text = row[0]
+    if text is None:
+        text = run()
+        if conn is not None:
+            try:
+                conn.execute("INSERT OR REPLACE INTO ocr_cache VALUES (?, ?)", (key, text))
+                conn.commit()
+            except sqlite3.Error:
+                pass  # concurrent writers: losing a cache entry is fine
+    if len(mem) < _OCR_CACHE_MAX_MEM:
+        mem[key] = text
+    return text
+
+
+def ocr_page_words(page_img: Image.Image, lang: str = "spa") -> PageWords:
+    """
+    OCR a whole page in a single Tesseract invocation (TSV word boxes).
+    Returns (center_x, center_y, left, texts) arrays so cells can pick up
+    their words by bbox intersection instead of spawning one Tesseract
+    process per cell.
+    """
+    data = pytesseract.image_to_data(
+        page_img, lang=lang, config="--psm 6 --oem 3", output_type=Output.DATAFRAME
+    )
+    data = data[(data.conf > 0) & data.text.notna()]
+    texts = data.text.astype(str).str.strip()
+    data = data[texts != ""]
+    texts = texts[texts != ""]
+    left = data.left.to_numpy(dtype=np.float64)
+    top = data.top.to_numpy(dtype=np.float64)
+    cx = left + data.width.to_numpy(dtype=np.float64) / 2.0
+    cy = top + data.height.to_numpy(dtype=np.float64) / 2.0
+    return cx, cy, left, texts.tolist()
+
+
+def words_in_rect(words: PageWords, rect: tuple[int, int, int, int]) -> str:
+    """
+    Join the page words whose centers fall inside the given pixel rect
+    (precomputed from the PDF bbox), left to right. Vectorised mask over
+    the per-page word arrays.
+    """
+    cx, cy, left, texts = words
+    x0, y0, x1, y1 = rect
+    mask = (cx >= x0) & (cx < x1) & (cy >= y0) & (cy < y1)
+    if not mask.any():
+        return ""
+    idx = np.flatnonzero(mask)
+    idx = idx[np.argsort(left[idx], kind="stable")]
+    return " ".join(texts[i] for i in idx).strip()
+
+
+def _is_blank(cell_img: Image.Image) -> bool:
+    """
+    True if the crop has virtually no dark pixels — i.e. no glyphs to OCR.
+    A single memory-bound pass that lets blank cells skip Tesseract's full
+    layout analysis.
+    """
+    arr = np.asarray(cell_img)
+    if arr.ndim == 3:
+        arr = arr.min(axis=2)
+    return int((arr < 128).sum()) < 3
 
 
 def ocr_cell(
@@ -22,40 +181,80 @@ def ocr_cell(
 ) -> str:
     """OCR a single cell. PSM 7 = single line. char_whitelist improves digit accuracy."""
     cell_img = crop_cell_image(page_img, bbox)
-    if cell_img is None:
+    if cell_img is None or _is_blank(cell_img):
         return ""
     cell_img = prepare_for_ocr(cell_img)
+    return _ocr_cached(
+        cell_img,
+        f"{psm}:{lang}:{char_whitelist or ''}",
+        lambda: _run_ocr(cell_img, psm, lang, char_whitelist),
+    )
+
+
+def _run_ocr(
+    cell_img: Image.Image, psm: int, lang: str, char_whitelist: str | None
+) -> str:
+    """Invoke Tesseract on a prepared image (tesserocr handle or pytesseract)."""
+    if tesserocr is not None:
+        api = _tess_api(psm, lang)
+        api.SetVariable("tessedit_char_whitelist", char_whitelist or "")
+        api.SetImage(cell_img)
+        return api.GetUTF8Text().strip()
     config = f"--psm {psm} --oem 3"
     if char_whitelist:
         config += f" -c tessedit_char_whitelist={char_whitelist}"
-    text = pytesseract.image_to_string(cell_img, lang=lang, config=config)
-    return text.strip()
+    return pytesseract.image_to_string(cell_img, lang=lang, config=config).strip()
 
 
-def detect_sign_cell(page_img: Image.Image, bbox: tuple[float, float, float, float]) -> str:
-    """Detect +/- sign using pixel analysis in the inner region of the cell."""
-    cell_img = crop_cell_image(page_img, bbox, pad=0)
-    if cell_img is None:
-        return "+"
-    gray = cell_img.convert("L")
-    w, h = gray.size
+def _sign_decide_numpy(inner: np.ndarray) -> int:
+    """Threshold + row-any + count via NumPy reductions; 1 for '-', 0 for '+'."""
+    dark_mask = inner < 100
+    if dark_mask.sum() < 2:
+        return 0
+    vertical_coverage = dark_mask.any(axis=1).sum() / inner.shape[0]
+    return 1 if vertical_coverage < 0.40 else 0
+
+
+if njit is not None:
+    # Single fused pass: for the tiny (~20×20) inner crops the NumPy
+    # dispatch overhead dominates the arithmetic, so JIT the loop.
+    @njit(cache=True, boundscheck=False)
+    def _sign_decide(inner: np.ndarray) -> int:  # pragma: no cover - compiled
+        ih, iw = inner.shape
+        dark_count = 0
+        dark_rows = 0
+        for y in range(ih):
+            row_has_dark = False
+            for x in range(iw):
+                if inner[y, x] < 100:
+                    dark_count += 1
+                    row_has_dark = True
+            if row_has_dark:
+                dark_rows += 1
+        if dark_count < 2:
+            return 0
+        return 1 if dark_rows / ih < 0.40 else 0
+else:
+    _sign_decide = _sign_decide_numpy
+
+
+def detect_sign_cell(page_gray: np.ndarray, rect: tuple[int, int, int, int]) -> str:
+    """
+    Detect +/- sign using pixel analysis in the inner region of the cell.
+    rect is a precomputed, clipped pixel rect; the cell is a pure NumPy
+    slice of the page-wide grayscale array (a view, no copy).
+    """
+    x0, y0, x1, y1 = rect
+    w, h = x1 - x0, y1 - y0
     if w < 6 or h < 6:
         return "+"
     margin_x = int(w * 0.20)
     margin_y = int(h * 0.20)
-    inner = gray.crop((margin_x, margin_y, w - margin_x, h - margin_y))
-    iw, ih = inner.size
+    inner = page_gray[y0 + margin_y : y1 - margin_y, x0 + margin_x : x1 - margin_x]
+    ih, iw = inner.shape
     if iw < 3 or ih < 3:
         return "+"
-    pixels = np.array(inner)
-    dark_mask = pixels < 100
-    dark_count = dark_mask.sum()
-    if dark_count < 2:
-        return "+"
-    rows_with_dark = dark_mask.any(axis=1)
-    dark_row_count = rows_with_dark.sum()
-    vertical_coverage = dark_row_count / ih
-    return "-" if vertical_coverage < 0.40 else "+"
+    return "-" if _sign_decide(inner) else "+"
 
 
 def ocr_region(
@@ -63,8 +262,9 @@ def ocr_region(
 ) -> str:
     """OCR a larger region (e.g. section header)."""
     cell_img = crop_cell_image(page_img, bbox, pad=4)
-    if cell_img is None:
+    if cell_img is None or _is_blank(cell_img):
         return ""
     cell_img = prepare_for_ocr(cell_img, min_height=60)
-    text = pytesseract.image_to_string(cell_img, lang=lang, config="--psm 6 --oem 3")
-    return text.strip()
+    return _ocr_cached(
+        cell_img, f"6:{lang}:", lambda: _run_ocr(cell_img, 6, lang, None)
+    )
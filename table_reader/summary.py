@@ -17,6 +17,16 @@ SUMMARY_COLUMNS = [
     "Total Tarjeta", "Total hipoteca", "Total de totales",
 ]
 
+# TABLE_NAME is fixed at import, so the formula fragments around the person
+# label are static — build them once instead of re-formatting per row.
+_SUMIFS_PREFIX = f'=SUMIFS({TABLE_NAME}[Monto], {TABLE_NAME}[De quien], "'
+_SUMIFS_SUFFIX = f'", {TABLE_NAME}[Tipo], "Cargo")'
+
+
+def _sumifs_cargo(label: str) -> str:
+    """SUMIFS of Cargo amounts attributed to the given person label."""
+    return "".join((_SUMIFS_PREFIX, label, _SUMIFS_SUFFIX))
+
 
 def build_summary() -> pd.DataFrame:
     """Build the per-person summary table filled with spreadsheet formulas."""
@@ -25,13 +35,9 @@ def build_summary() -> pd.DataFrame:
     for i, person in enumerate(PEOPLE):
         excel_row = i + 2
         split_frac = SPLIT[person]
-        debe_formula = (
-            f'=SUMIFS({TABLE_NAME}[Monto], {TABLE_NAME}[De quien], "{person}", '
-            f'{TABLE_NAME}[Tipo], "Cargo")'
-        )
-        los_2_formula = (
-            f'=SUMIFS({TABLE_NAME}[Monto], {TABLE_NAME}[De quien], "{SHARED_LABEL}", '
-            f'{TABLE_NAME}[Tipo], "Cargo")*{split_frac:.4f}'
+        debe_formula = _sumifs_cargo(person)
+        los_2_formula = "".join(
+            (_SUMIFS_PREFIX, SHARED_LABEL, _SUMIFS_SUFFIX, "*", f"{split_frac:.4f}")
         )
         total_tarjeta = f"=B{excel_row}+C{excel_row}"
         total_hipoteca = round(MORTGAGE_TOTAL * split_frac, 2)
@@ -46,10 +52,7 @@ def build_summary() -> pd.DataFrame:
         })
 
     totals_row = len(PEOPLE) + 2
-    shared_formula = (
-        f'=SUMIFS({TABLE_NAME}[Monto], {TABLE_NAME}[De quien], "{SHARED_LABEL}", '
-        f'{TABLE_NAME}[Tipo], "Cargo")'
-    )
+    shared_formula = _sumifs_cargo(SHARED_LABEL)
     sum_tarjeta = f"=SUM(D2:D{totals_row - 1})"
     sum_hipoteca = round(sum(SPLIT[p] * MORTGAGE_TOTAL for p in PEOPLE), 2)
     sum_totales = f"=SUM(F2:F{totals_row - 1})"